@@ -0,0 +1,5 @@
+# 로컬 개발용 실행 (운영은 gunicorn 사용)
+from main import app
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
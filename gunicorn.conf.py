@@ -0,0 +1,24 @@
+# gunicorn 설정 (gunicorn main:app)
+import multiprocessing
+import os
+
+bind = '0.0.0.0:5000'
+
+
+# 컨테이너의 CPU 제한(affinity)을 반영한 CPU 수
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+# 외부 요청 대기가 많으므로 스레드 워커 사용 (WEB_CONCURRENCY로 워커 수 지정 가능)
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', available_cpus()))
+threads = 8
+worker_connections = 1000
+
+# 워커마다 fork 이후 MongoClient를 새로 생성
+# (meta 캐시, URL 필터는 워커별 캐시일 뿐이고 중복 방지는 DB unique 인덱스가 담당)
+preload_app = False
@@ -1,32 +1,28 @@
 # 내장
-import json
+import hashlib
+import html
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
 from functools import wraps
 from datetime import datetime, timezone, timedelta
 import os
-import subprocess
-import sys
-
-# 패키지 자동 설치
-def install_requirements():
-    try:
-        subprocess.check_call(["pip", "install", "-r", "requirements.txt"])
-    except subprocess.CalledProcessError as e:
-        print(f"패키지 설치 중 오류 발생: {e}")
-        sys.exit(1)
-
-# requirements.txt가 있으면 패키지 설치
-if os.path.exists("requirements.txt"):
-    install_requirements()
 
 # 외부
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from flask.json.provider import JSONProvider
 from bson import ObjectId
 from dotenv import load_dotenv
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import TTLCache
+from pybloom_live import ScalableBloomFilter
 
 load_dotenv()
 
@@ -36,57 +32,247 @@ CORS(app)
 client = MongoClient(os.getenv("MONGO_URI"))
 db = client[os.getenv("MONGO_DB")]
 
+# 목록 조회(trash 필터 + 최신순 정렬 + 커서)용 인덱스
+LOG_INDEX = [('trash', 1), ('created_at', -1), ('_id', -1)]
+db.logs.create_index(LOG_INDEX)
+
+# 중복 URL 방지용 인덱스 (삭제되지 않은 Log끼리만 URL이 겹치지 않도록 DB에서 보장)
+try:
+    db.logs.create_index(
+        'url',
+        name='url_active_unique',
+        unique=True,
+        partialFilterExpression={'trash': False}
+    )
+    URL_UNIQUE_INDEX = True
+except OperationFailure as e:
+    # 이미 중복된 URL이 있으면 unique 인덱스를 만들 수 없으므로, 매번 DB에서 중복 여부를 확인
+    print(f"URL unique 인덱스 생성 실패, DB 조회로 중복 확인: {e}")
+    db.logs.create_index('url', name='url_active', partialFilterExpression={'trash': False})
+    URL_UNIQUE_INDEX = False
+
+# 등록된 URL 필터 (프로세스별 캐시라 중복일 가능성이 있을 때 빨리 거절하는 용도로만 사용)
+URL_BLOOM = ScalableBloomFilter(
+    initial_capacity=100000,
+    error_rate=0.001,
+    mode=ScalableBloomFilter.LARGE_SET_GROWTH
+)
+URL_BLOOM_LOCK = threading.Lock()
+for logged in db.logs.find({'trash': False}, {'url': 1, '_id': 0}):
+    if 'url' in logged:
+        URL_BLOOM.add(logged['url'])
+
+# 등록된 URL을 필터에 추가 (실패해도 Log 저장에는 영향 없음)
+def remember_url(url):
+    try:
+        with URL_BLOOM_LOCK:
+            URL_BLOOM.add(url)
+    except Exception as e:
+        print(f"URL 필터 추가 중 에러 발생: {e}")
+
+# 목록 변경 여부(ETag) 확인용 인덱스
+db.logs.create_index([('updated_at', -1)])
+
+# 목록 조회 시 반환할 필드
+LOG_PROJECTION = {'_id': 1, 'name': 1, 'url': 1, 'created_at': 1, 'meta_info': 1}
+
 # 한국 시간대 설정
 KST = timezone(timedelta(hours=9))
 
+# 멤버 목록
+JUNGLERS = frozenset((
+    '고민지', '김기래', '김동규', '김민규', '김보아', '김성종', '김수민', '김현호',
+    '류승찬', '박수연', '박혜린', '배상화', '송상록', '신예린', '신우진', '안수연',
+    '안준표', '안태주', '양진성', '오준탁', '유호준', '이종호', '이주명', '이주형',
+    '이지윤', '이태윤', '장준영', '조성진', '최선하', '한진우', '홍석표', '황희구'
+))
+
+# 외부 요청은 하나의 세션으로 처리 (재시도, 타임아웃 공통 적용)
+# meta 추출은 본문을 끝까지 읽지 않으면 커넥션을 닫으므로, 재사용은 본문을 다 읽은 경우에만 됨
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+)
+SESSION.mount('http://', _adapter)
+SESSION.mount('https://', _adapter)
 
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, ObjectId):
-            return str(o)
-        if isinstance(o, datetime):
-            return o.strftime('%Y-%m-%d %H:%M:%S')
-        return json.JSONEncoder.default(self, o)
+# (연결, 읽기) 타임아웃
+REQUEST_TIMEOUT = (3, 10)
+
+
+# 응답에 사용하는 날짜 형식
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+STRFTIME = datetime.strftime
+
+
+# JSON 직렬화가 기본 지원하지 않는 타입 처리
+def json_default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, datetime):
+        return STRFTIME(o, DATETIME_FORMAT)
+    raise TypeError(f"Type is not JSON serializable: {type(o).__name__}")
+
+
+# datetime은 기존 형식을 유지하도록 json_default로 넘김
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
 
 
 class CustomJSONProvider(JSONProvider):
     def dumps(self, obj, **kwargs):
-        return json.dumps(obj, **kwargs, cls=CustomJSONEncoder)
+        return orjson.dumps(obj, default=json_default, option=ORJSON_OPTIONS).decode()
 
     def loads(self, s, **kwargs):
-        return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # bytes를 그대로 응답 본문으로 사용해 다시 인코딩하지 않음
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=json_default, option=ORJSON_OPTIONS),
+            mimetype='application/json'
+        )
 
 
 app.json = CustomJSONProvider(app)
 
-# meta 정보 가져오기
+# meta 태그 추출용 정규식
+# 따옴표 안의 '>'는 태그 끝으로 보지 않음, 속성 값은 따옴표 없이도 허용
+# (닫히지 않은 따옴표가 다음 meta 태그까지 이어지지 않도록 '<meta'에서 끊음)
+META_RE = re.compile(
+    rb'''<meta\b(?:[^<>"']|"(?:[^"<]|<(?!meta\b))*"|'(?:[^'<]|<(?!meta\b))*')*>''',
+    re.I
+)
+ATTR_RE = re.compile(rb'''([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''')
+CHARSET_RE = re.compile(rb'''charset\s*=\s*["']?([\w-]+)''', re.I)
+HEAD_END_RE = re.compile(rb'</head\s*>', re.I)
+
+# meta 정보는 <head> 안에 있으므로 앞부분만 읽음
+HEAD_MAX_BYTES = 256 * 1024
+HEAD_CHUNK_SIZE = 8 * 1024
+
+# (속성, 값) -> 결과 키
+META_KEYS = {
+    (b'name', b'description'): 'description',
+    (b'property', b'og:title'): 'og_title',
+    (b'property', b'og:image'): 'og_image',
+    (b'property', b'og:url'): 'og_url'
+}
+
+# meta 속성 값을 문자열로 변환
+def decode_meta_value(value, encoding):
+    try:
+        text = value.decode(encoding, errors='replace')
+    except LookupError:
+        text = value.decode('utf-8', errors='replace')
+    return html.unescape(text)
+
+# 같은 URL의 meta 정보는 1시간 동안 재사용
+# (삭제된 Log의 URL을 다시 등록하거나, host 대소문자/fragment만 다른 URL을 등록하는 경우에 사용됨)
+META_CACHE = TTLCache(maxsize=4096, ttl=3600)
+META_CACHE_LOCK = threading.Lock()
+
+# 캐시 키로 쓰기 위해 URL 정규화 (scheme/host 소문자, fragment 제거)
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ''))
+
+# meta 정보 가져오기 (캐시 우선)
 def get_meta_tags(url):
+    key = normalize_url(url)
+    with META_CACHE_LOCK:
+        meta = META_CACHE.get(key)
+    if meta is None:
+        meta = fetch_meta_tags(url)
+        # 실패한 결과는 캐시하지 않음
+        if meta is None:
+            return None
+        with META_CACHE_LOCK:
+            META_CACHE[key] = meta
+    return dict(meta)
+
+# 응답 본문을 </head>가 나오거나 최대 크기에 도달할 때까지만 읽기
+def read_head(response):
+    head = bytearray()
+    for chunk in response.iter_content(chunk_size=HEAD_CHUNK_SIZE):
+        # 청크 경계에 걸친 </head>도 찾을 수 있도록 조금 앞에서부터 검색
+        start = max(0, len(head) - 16)
+        head += chunk
+        head_end = HEAD_END_RE.search(head, start)
+        if head_end:
+            return bytes(head[:head_end.start()])
+        if len(head) >= HEAD_MAX_BYTES:
+            break
+    return bytes(head[:HEAD_MAX_BYTES])
+
+# 웹 페이지에서 meta 정보 추출
+def fetch_meta_tags(url):
     try:
-        # 웹 페이지 요청
-        response = requests.get(url)
-        response.raise_for_status()
-
-        # BeautifulSoup으로 HTML 파싱
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # 메타 태그 추출
-        description = soup.find('meta', {'name': 'description'})
-        og_title = soup.find('meta', {'property': 'og:title'})
-        og_image = soup.find('meta', {'property': 'og:image'})
-        og_url = soup.find('meta', {'property': 'og:url'})
-
-        # 결과를 딕셔너리로 구성
-        return {
-            "description": description['content'] if description else None,
-            "og_title": og_title['content'] if og_title else None,
-            "og_image": og_image['content'] if og_image else None,
-            "og_url": og_url['content'] if og_url else None
-        }
+        # 웹 페이지 요청 (본문 전체를 받지 않고 앞부분만 읽음)
+        # </head>에서 멈추면 남은 본문과 함께 커넥션은 풀로 돌아가지 않고 닫힘
+        with SESSION.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            head = read_head(response)
+
+        charset = (CHARSET_RE.search(response.headers.get('Content-Type', '').encode('latin-1'))
+                   or CHARSET_RE.search(head))
+        encoding = charset.group(1).decode('ascii') if charset else 'utf-8'
+
+        # 메타 태그 추출 (같은 태그가 여러 개면 첫 번째 사용)
+        meta = dict.fromkeys(META_KEYS.values())
+        for tag in META_RE.finditer(head):
+            attrs = {
+                attr.group(1).lower(): next(v for v in attr.groups()[1:] if v is not None)
+                for attr in ATTR_RE.finditer(tag.group())
+            }
+            for (attr, value), key in META_KEYS.items():
+                if attrs.get(attr) == value and meta[key] is None and b'content' in attrs:
+                    meta[key] = decode_meta_value(attrs[b'content'], encoding)
+
+        return meta
 
     except Exception as e:
         print(f"메타 태그 추출 중 에러 발생: {e}")
         return None
 
+# 메타 태그 추출은 요청 처리와 별도로 백그라운드에서 실행
+META_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# 저장된 Log에 메타 태그 정보 채우기
+def enrich_meta_info(log_id, url):
+    try:
+        meta_info = get_meta_tags(url)
+        if meta_info:
+            db.logs.update_one(
+                {'_id': log_id},
+                {'$set': {'meta_info': meta_info, 'updated_at': datetime.now()}}
+            )
+    except Exception as e:
+        print(f"메타 태그 저장 중 에러 발생: {e}")
+
+# 목록 조회 커서 생성 (<created_at>_<_id>)
+def make_cursor(log):
+    return f"{log['created_at'].isoformat()}_{log['_id']}"
+
+# 목록 조회 커서 해석, 형식이 올바르지 않으면 None
+def parse_cursor(cursor):
+    try:
+        created_at, oid = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), ObjectId(oid)
+    except Exception:
+        return None
+
+# 목록 ETag 계산 (마지막 변경 문서 + 요청 파라미터)
+# Log를 추가/수정/삭제(trash)할 때는 반드시 updated_at을 갱신해야 함
+def make_logs_etag():
+    latest = db.logs.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+    updated_at = latest.get('updated_at') if latest else None
+    latest_id = latest['_id'] if latest else None
+    key = f"{updated_at}:{latest_id}:{request.query_string.decode()}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
 # API 응답 일관된 형식으로 반환
 def api_response(data=None, message=None, status=200):
     return jsonify({
@@ -142,27 +328,35 @@ def insert_til(data):
         name = data.get('name')
         url = data.get('url')
 
-        junglers = [
-            '고민지', '김기래', '김동규', '김민규', '김보아', '김성종', '김수민', '김현호',
-            '류승찬', '박수연', '박혜린', '배상화', '송상록', '신예린', '신우진', '안수연',
-            '안준표', '안태주', '양진성', '오준탁', '유호준', '이종호', '이주명', '이주형',
-            '이지윤', '이태윤', '장준영', '조성진', '최선하', '한진우', '홍석표', '황희구'
-        ]
-
-        if name not in junglers:
+        if name not in JUNGLERS:
             return api_response(message='멤버가 아닙니다.', status=400)
 
-        # 메타 태그 정보 추출
-        meta_info = get_meta_tags(url)
+        # 필터에 있으면 DB에서 중복 여부를 먼저 확인 (없다고 나와도 최종 판단은 unique 인덱스)
+        # unique 인덱스가 없으면 필터와 관계없이 항상 DB에서 확인
+        with URL_BLOOM_LOCK:
+            maybe_logged = url in URL_BLOOM
+        if (maybe_logged or not URL_UNIQUE_INDEX) and db.logs.find_one({'url': url, 'trash': False}, {'_id': 1}):
+            return api_response(message='이미 등록된 Log입니다.', status=400)
 
+        now = datetime.now()
         new_til = {
             'name': name,
             'url': url,
-            'created_at': datetime.now(),
+            'created_at': now,
+            'updated_at': now,
             'trash': False,
-            'meta_info': meta_info if meta_info else {}
+            'meta_info': {}
         }
-        result = db.logs.insert_one(new_til)
+        try:
+            result = db.logs.insert_one(new_til)
+        except DuplicateKeyError:
+            remember_url(url)
+            return api_response(message='이미 등록된 Log입니다.', status=400)
+        remember_url(url)
+
+        # 메타 태그 정보는 응답 후 백그라운드에서 채움
+        META_EXECUTOR.submit(enrich_meta_info, result.inserted_id, url)
+
         return api_response({'inserted_id': str(result.inserted_id)}, status=200)
     except Exception as e:
         return api_response(message='Log 남기기에 실패했습니다.', status=404)
@@ -170,8 +364,17 @@ def insert_til(data):
 @app.route('/api/logs')
 def list_til():
     try:
-        # GET 파라미터에서 page 가져오기
+        # 목록이 바뀌지 않았으면 본문 없이 304 반환
+        # (조회 중 추가된 Log가 이전 ETag로 가려지지 않도록 목록 조회 전에 계산)
+        etag = make_logs_etag()
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        # GET 파라미터에서 page, cursor 가져오기
         page = request.args.get('page', '1')
+        cursor = parse_cursor(request.args.get('cursor', ''))
         
         # page가 숫자인지 확인
         try:
@@ -187,24 +390,37 @@ def list_til():
         # 검색 조건 설정
         query = {'trash': False}
 
-        # 전체 문서 수 계산
-        total_docs = db.logs.count_documents(query)
-        total_pages = (total_docs + per_page - 1) // per_page
+        # 커서가 있으면 커서 이후 항목부터 조회 (page는 무시)
+        if cursor:
+            created_at, oid = cursor
+            # created_at 범위로 인덱스 탐색 범위를 좁히고, 같은 시각은 _id로 구분
+            query['created_at'] = {'$lte': created_at}
+            query['$or'] = [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, '_id': {'$lt': oid}}
+            ]
+            skip = 0
+        else:
+            skip = (page - 1) * per_page
 
         # MongoDB에서 TIL 목록 조회
-        logs = list(db.logs.find(
-            query,
-            {'_id': 1, 'name': 1, 'url': 1, 'created_at': 1, 'meta_info': 1}
-        ).sort('created_at', -1).skip((page - 1) * per_page).limit(per_page))
+        # 다음 페이지 존재 여부를 알기 위해 한 개 더 가져옴
+        logs = list(db.logs.find(query, LOG_PROJECTION)
+                    .hint(LOG_INDEX)
+                    .sort([('created_at', -1), ('_id', -1)])
+                    .skip(skip)
+                    .limit(per_page + 1))
+
+        finished = len(logs) <= per_page
+        logs = logs[:per_page]
 
-        return api_response(data={
+        response, status = api_response(data={
             'logs': logs,
-            'finished': page >= total_pages
+            'finished': finished,
+            'next_cursor': make_cursor(logs[-1]) if not finished else None
         }, status=200)
+        response.set_etag(etag)
+        return response, status
     except Exception as e:
         print(e)
         return api_response(message='TIL 목록 조회에 실패했습니다.', status=404)
-
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file